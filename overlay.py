@@ -1,78 +1,167 @@
-# pip install requests pandas geopandas folium geopy
+# pip install requests pandas geopandas pyogrio jinja2 topojson orjson geopy
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 import geopandas as gpd
-import folium
+from jinja2 import Environment, FileSystemLoader
+import topojson
+import orjson
+try:
+    import pyogrio
+except ImportError:  # Fall back to geopandas' default engine
+    pyogrio = None
 from geopy.geocoders import Nominatim
+from geopy.adapters import RequestsAdapter
+from geopy.extra.rate_limiter import RateLimiter
 from geopy.exc import GeocoderTimedOut, GeocoderServiceError
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 import os
+import argparse
+import shelve
+import shutil
+import tempfile
+from email.utils import formatdate, parsedate_to_datetime
+from contextlib import contextmanager
 from shapely.geometry import Point
 
+# Shared HTTP session so TCP/TLS connections are kept alive and reused
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+))
+
+# Geocoded addresses are cached on disk so repeated runs skip Nominatim
+GEOCODE_CACHE_FILE = "geocode_cache.db"
+GEOCODE_CACHE_TTL = 90 * 24 * 60 * 60  # 90 days, in seconds
+# Failed lookups are cached too, for less time, so known-bad addresses are
+# not retried against Nominatim on every run
+GEOCODE_FAILURE_TTL = 7 * 24 * 60 * 60  # 7 days, in seconds
+
+# The TIGER/Line counties zip only changes yearly, so keep it between runs
+COUNTIES_CACHE_FILE = os.path.join(tempfile.gettempdir(), "tl_2023_us_county.zip")
+
+# County simplification tolerance in degrees (~500 m at Florida's latitude)
+SIMPLIFY_TOLERANCE = 0.005
+
+# TopoJSON quantization factor: coordinates snap to a 1e5 grid over the
+# bounding box, ~7.6e-5 degrees (~8 m) per step across Florida. Coarser
+# than the package default (1e6) but far below what is visible on the map
+TOPOJSON_QUANTIZATION = 1e5
+
+# Centre of Florida's bounding box (lat, lon), used for the initial map view;
+# the county bounds span roughly 24.4..31.0 N and 87.6..80.0 W
+FLORIDA_CENTER = (27.7, -83.8)
+
+# Leaflet page template, rendered by create_map()
+MAP_TEMPLATE = "fortiline_map.html.j2"
+TEMPLATE_ENV = Environment(loader=FileSystemLoader(os.path.dirname(os.path.abspath(__file__))))
+
+
+def download_counties_shapefile(counties_url, cache_path=COUNTIES_CACHE_FILE):
+    """
+    Download the counties shapefile to a persistent cache path.
+    If a cached copy exists, a conditional GET is sent and the download is
+    skipped when the server answers 304 Not Modified.
+    """
+    headers = {}
+    if os.path.exists(cache_path):
+        headers['If-Modified-Since'] = formatdate(os.path.getmtime(cache_path), usegmt=True)
+    
+    try:
+        response = SESSION.get(counties_url, headers=headers, timeout=60, stream=True)
+        if response.status_code == 304:
+            response.close()  # Release the streamed connection back to the pool
+            print("  Using cached US counties shapefile")
+            return cache_path
+        response.raise_for_status()
+    except requests.RequestException as e:
+        if os.path.exists(cache_path):
+            print(f"  Could not check for updates ({e}); using cached shapefile")
+            return cache_path
+        raise
+    
+    print("  Downloading US counties shapefile (this may take a moment)...")
+    
+    # Download to a partial file so an interrupted run never leaves a corrupt cache
+    partial_path = cache_path + ".part"
+    response.raw.decode_content = True  # Undo any gzip/deflate transfer encoding
+    with response, open(partial_path, 'wb') as f:
+        shutil.copyfileobj(response.raw, f, length=1 << 20)  # 1 MB chunks
+    os.replace(partial_path, cache_path)
+    
+    # Stamp the cache with the server's Last-Modified so the next
+    # If-Modified-Since reflects the file's version, not our download time
+    last_modified = response.headers.get('Last-Modified')
+    if last_modified:
+        timestamp = parsedate_to_datetime(last_modified).timestamp()
+        os.utime(cache_path, (timestamp, timestamp))
+    
+    print(f"  Downloaded: {os.path.getsize(cache_path) / (1024*1024):.1f} MB")
+    
+    return cache_path
+
+
 def get_florida_counties():
     """
-    Get Florida county boundaries using US Census Bureau TIGER/Line data.
-    Downloads the 2023 county shapefile and filters for Florida.
+    Get Florida county boundaries using US Census Bureau TIGER data.
+    Queries only Florida counties from the TIGERweb REST service, falling back
+    to the full 2023 TIGER/Line county shapefile filtered for Florida.
     """
     print("Downloading Florida county boundaries...")
     
+    # TIGERweb returns just the 67 Florida counties as GeoJSON (~1-2 MB)
+    tigerweb_url = (
+        "https://tigerweb.geo.census.gov/arcgis/rest/services/TIGERweb/State_County/"
+        "MapServer/14/query?where=STATE%3D%2712%27&outFields=BASENAME,GEOID&f=geojson"
+    )
+    
     # US Census Bureau TIGER/Line 2023 counties shapefile
     # This is a direct download link for the counties shapefile
     counties_url = "https://www2.census.gov/geo/tiger/TIGER2023/COUNTY/tl_2023_us_county.zip"
     
     try:
-        # Download the shapefile
-        print("  Downloading US counties shapefile (this may take a moment)...")
-        response = requests.get(counties_url, timeout=60, stream=True)
+        print("  Querying TIGERweb for Florida counties...")
+        response = SESSION.get(tigerweb_url, timeout=60)
         response.raise_for_status()
-        
-        # Save temporarily
-        temp_file = "temp_counties.zip"
-        total_size = int(response.headers.get('content-length', 0))
-        downloaded = 0
-        
-        with open(temp_file, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    if total_size > 0:
-                        percent = (downloaded / total_size) * 100
-                        if downloaded % (1024 * 1024) == 0:  # Print every MB
-                            print(f"  Downloaded: {downloaded / (1024*1024):.1f} MB ({percent:.1f}%)")
-        
-        print("  Reading shapefile...")
-        # Read into GeoDataFrame
-        counties_gdf = gpd.read_file(f"zip://{temp_file}")
-        
-        # Filter for Florida (STATEFP = '12')
-        florida_counties = counties_gdf[counties_gdf['STATEFP'] == '12'].copy()
-        
-        # Ensure CRS is WGS84 (EPSG:4326) for folium
-        if florida_counties.crs != 'EPSG:4326':
-            florida_counties = florida_counties.to_crs('EPSG:4326')
-        
-        # Clean up temp file
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
-        
-        print(f"  ✓ Loaded {len(florida_counties)} Florida counties")
-        return florida_counties
+        # GeoJSON output from TIGERweb is always WGS84
+        florida_counties = gpd.GeoDataFrame.from_features(response.json()["features"], crs=4326)
+        # TIGERweb's NAME carries the " County" suffix; BASENAME matches the
+        # TIGER/Line NAME field, so both sources produce the same properties
+        florida_counties = florida_counties.rename(columns={"BASENAME": "NAME"})
         
     except Exception as e:
-        print(f"  Error downloading counties: {e}")
+        print(f"  Error querying TIGERweb: {e}")
         print("  Attempting alternative method...")
         
-        # Fallback: Try using a GeoJSON from a public source
+        # Fallback: the nationwide TIGER/Line shapefile
         try:
-            # Alternative: Use a GeoJSON from a reliable source
-            geojson_url = "https://raw.githubusercontent.com/plotly/datasets/master/geojson-counties-fips.json"
-            print("  Trying alternative GeoJSON source...")
+            # Download the shapefile (or reuse the cached copy)
+            zip_path = download_counties_shapefile(counties_url)
             
-            # This approach requires different handling, so let's stick with the primary method
-            # and provide clear error message
-            raise Exception("Primary download method failed. Please check your internet connection.")
+            print("  Reading shapefile...")
+            if pyogrio is not None:
+                # Read into GeoDataFrame, pushing the Florida filter (STATEFP = '12')
+                # down to GDAL so only Florida features are materialised
+                florida_counties = gpd.read_file(
+                    f"zip://{zip_path}",
+                    engine="pyogrio",
+                    where="STATEFP = '12'",
+                    columns=["NAME", "GEOID"]
+                )
+            else:
+                counties_gdf = gpd.read_file(f"zip://{zip_path}")
+                
+                # Filter for Florida (STATEFP = '12') on integer category codes
+                # rather than comparing every row's string; no copy is needed
+                # since the full frame is discarded
+                statefp = counties_gdf['STATEFP'].astype('category')
+                mask = statefp.cat.codes == statefp.cat.categories.get_loc('12')
+                florida_counties = counties_gdf.loc[mask, ["NAME", "GEOID", "geometry"]]
             
         except Exception as e2:
             print(f"  Alternative method also failed: {e2}")
@@ -81,154 +170,237 @@ def get_florida_counties():
             print("    2. Sufficient disk space (~50MB)")
             print("    3. All required packages installed")
             raise
+    
+    # Ensure CRS is WGS84 (EPSG:4326) for Leaflet; comparing EPSG codes avoids
+    # building a CRS from a string and reprojecting data that is already WGS84
+    if florida_counties.crs is None:
+        raise ValueError("County boundaries have no CRS; cannot reproject to WGS84")
+    if florida_counties.crs.to_epsg() != 4326:
+        florida_counties = florida_counties.to_crs(4326)
+    
+    print(f"  ✓ Loaded {len(florida_counties)} Florida counties")
+    return florida_counties
 
 
-def geocode_address(address, geolocator, max_retries=3):
+def geocode_address(address, geocode, max_retries=3):
     """
     Geocode an address with retry logic.
+    `geocode` is a rate-limited geocoding callable shared across worker threads.
+    Returns (None, None) when Nominatim has no match for the address; timeouts
+    and service errors are retried and re-raised once retries are exhausted.
     """
     for attempt in range(max_retries):
         try:
-            location = geolocator.geocode(address, timeout=10)
-            if location:
-                return location.latitude, location.longitude
-            time.sleep(1)  # Rate limiting
-        except (GeocoderTimedOut, GeocoderServiceError) as e:
+            location = geocode(address, timeout=10)
+        except (GeocoderTimedOut, GeocoderServiceError):
             if attempt < max_retries - 1:
                 time.sleep(2 ** attempt)  # Exponential backoff
                 continue
-            else:
-                print(f"Failed to geocode {address}: {e}")
-                return None, None
-    return None, None
+            raise
+        
+        if location:
+            return location.latitude, location.longitude
+        # A definite "no match"; asking again will not change the answer
+        return None, None
+
+
+@contextmanager
+def geocode_cache(path=GEOCODE_CACHE_FILE):
+    """
+    Open the on-disk geocode cache, making sure it is flushed and closed on exit.
+    """
+    cache = shelve.open(path)
+    try:
+        yield cache
+    finally:
+        cache.close()
+
+
+def cache_key(address):
+    """
+    Normalise an address into a cache key.
+    """
+    return address.strip().lower()
 
 
 def get_fortiline_branches():
     """
     Define Fortiline Waterworks branches in Florida.
-    Returns a list of dictionaries with name and address.
+    Returns a list of dictionaries with name, address and pre-geocoded
+    latitude/longitude. Coordinates are None for branches that still need
+    geocoding; regenerate them with `python overlay.py --refresh-geocodes`.
     """
     branches = [
-        {"name": "Miami", "address": "14202 SW 142nd Ave, Miami, FL 33186"},
-        {"name": "Pompano Beach", "address": "2250 N Andrews Ave, Pompano Beach, FL 33069"},
-        {"name": "Riviera Beach", "address": "6759 White Dr, Riviera Beach, FL 33407"},
-        {"name": "Fort Pierce", "address": "3904 Selvitz Rd, Fort Pierce, FL 34982"},
-
-        {"name": "Fort Myers", "address": "4810 Laredo Ave, Fort Myers, FL 33905"},
-        {"name": "Sarasota", "address": "2074 47th Street, Sarasota, FL 34234"},
-        {"name": "Tampa", "address": "1031 S 86th Street, Tampa, FL 33619"},
-        {"name": "Dundee", "address": "225 W Frederick Ave, Dundee, FL 33838"},
-        {"name": "Kissimmee", "address": "731 Duncan Ave, Kissimmee, FL 34744"},
-
-        {"name": "Apopka", "address": "3636 Fudge Rd, Apopka, FL 32703"},
-        {"name": "Sanford", "address": "2291 West Airport Blvd, Sanford, FL 32771"},
-        {"name": "Port Orange", "address": "700 Oak Heights Ct, Port Orange, FL 32129"},
-        {"name": "Ocala", "address": "3518 SW 13th St, Ocala, FL 34474"},
-
-        {"name": "St Augustine", "address": "3780 Deerpark Blvd, St Augustine, Fl 32033"},
-        {"name": "Jacksonville", "address": "6982 Highway Ave, Jacksonville, FL 32254"},
-        {"name": "Lake City", "address": "3847 US-441, Lake City, FL 32025"},
-
-        {"name": "Panama City", "address": "1417 Transmitter Rd, Fl 32401"},
+        {"name": "Miami", "address": "14202 SW 142nd Ave, Miami, FL 33186", "latitude": 25.6347524, "longitude": -80.4233661},
+        {"name": "Pompano Beach", "address": "2250 N Andrews Ave, Pompano Beach, FL 33069", "latitude": 26.2101408, "longitude": -80.1420195},
+        {"name": "Riviera Beach", "address": "6759 White Dr, Riviera Beach, FL 33407", "latitude": 26.7757619, "longitude": -80.1054108},
+        {"name": "Fort Pierce", "address": "3904 Selvitz Rd, Fort Pierce, FL 34982", "latitude": 27.3978706, "longitude": -80.3662821},
+
+        {"name": "Fort Myers", "address": "4810 Laredo Ave, Fort Myers, FL 33905", "latitude": 26.6453545, "longitude": -81.8136427},
+        {"name": "Sarasota", "address": "2074 47th Street, Sarasota, FL 34234", "latitude": 27.3747569, "longitude": -82.5285797},
+        {"name": "Tampa", "address": "1031 S 86th Street, Tampa, FL 33619", "latitude": None, "longitude": None},
+        {"name": "Dundee", "address": "225 W Frederick Ave, Dundee, FL 33838", "latitude": 28.0257981, "longitude": -81.6341546},
+        {"name": "Kissimmee", "address": "731 Duncan Ave, Kissimmee, FL 34744", "latitude": 28.3208058, "longitude": -81.4016863},
+
+        {"name": "Apopka", "address": "3636 Fudge Rd, Apopka, FL 32703", "latitude": 28.6968539, "longitude": -81.5694546},
+        {"name": "Sanford", "address": "2291 West Airport Blvd, Sanford, FL 32771", "latitude": 28.7846498, "longitude": -81.2975522},
+        {"name": "Port Orange", "address": "700 Oak Heights Ct, Port Orange, FL 32129", "latitude": 29.1330633, "longitude": -80.9887547},
+        {"name": "Ocala", "address": "3518 SW 13th St, Ocala, FL 34474", "latitude": 29.175578, "longitude": -82.1822669},
+
+        {"name": "St Augustine", "address": "3780 Deerpark Blvd, St Augustine, Fl 32033", "latitude": None, "longitude": None},
+        {"name": "Jacksonville", "address": "6982 Highway Ave, Jacksonville, FL 32254", "latitude": 30.3192919, "longitude": -81.7634311},
+        {"name": "Lake City", "address": "3847 US-441, Lake City, FL 32025", "latitude": 30.1571691, "longitude": -82.6394101},
+
+        {"name": "Panama City", "address": "1417 Transmitter Rd, Fl 32401", "latitude": 30.1738645, "longitude": -85.6082054},
    
     ]
     return branches
 
 
-def geocode_branches(branches):
+def refresh_geocodes():
+    """
+    Maintenance task: geocode every branch address and print the updated
+    static table to paste into get_fortiline_branches().
+    """
+    branches = get_fortiline_branches()
+    branch_locations = {b["name"]: b for b in geocode_branches(branches, refresh=True)}
+    
+    print("\nUpdated branch table:")
+    for branch in branches:
+        location = branch_locations.get(branch["name"], {})
+        print(
+            f'        {{"name": "{branch["name"]}", "address": "{branch["address"]}", '
+            f'"latitude": {location.get("latitude")}, "longitude": {location.get("longitude")}}},'
+        )
+
+
+def geocode_branches(branches, max_workers=6, refresh=False):
     """
     Geocode all branch addresses to get lat/long coordinates.
+    Requests are issued from a thread pool so network latency overlaps,
+    while a shared RateLimiter keeps us within Nominatim's 1 request/second policy.
+    With `refresh` set, cached results are ignored and every address is
+    queried again; fresh results are still written back to the cache.
     """
     print("Geocoding Fortiline branch addresses...")
-    geolocator = Nominatim(user_agent="fortiline_florida_map")
+    # RequestsAdapter keeps a persistent session so connections are reused across threads
+    geolocator = Nominatim(user_agent="fortiline_florida_map", adapter_factory=RequestsAdapter)
+    # Retries are handled in geocode_address, so let errors through the rate limiter
+    geocode = RateLimiter(
+        geolocator.geocode,
+        min_delay_seconds=1.05,
+        max_retries=0,
+        swallow_exceptions=False
+    )
     
-    branch_locations = []
-    for i, branch in enumerate(branches, 1):
-        print(f"  Geocoding {i}/{len(branches)}: {branch['name']}...")
-        lat, lon = geocode_address(branch["address"], geolocator)
+    results = [None] * len(branches)
+    with geocode_cache() as cache:
+        # Serve what we can from the cache; only misses go to the network
+        pending = []
+        for i, branch in enumerate(branches):
+            cached = None if refresh else cache.get(cache_key(branch["address"]))
+            if not cached:
+                pending.append(i)
+                continue
+            
+            lat, lon, cached_at = cached
+            age = time.time() - cached_at
+            if lat is None:
+                # Negative entry: Nominatim recently had no match for this address
+                if age >= GEOCODE_FAILURE_TTL:
+                    pending.append(i)
+                else:
+                    print(f"  Skipping {branch['name']}: no geocoding match found recently")
+            elif age < GEOCODE_CACHE_TTL:
+                results[i] = {
+                    "name": branch["name"],
+                    "address": branch["address"],
+                    "latitude": lat,
+                    "longitude": lon
+                }
+            else:
+                pending.append(i)
         
-        if lat and lon:
-            branch_locations.append({
-                "name": branch["name"],
-                "address": branch["address"],
-                "latitude": lat,
-                "longitude": lon
-            })
-            print(f"    ✓ Found: ({lat:.4f}, {lon:.4f})")
-        else:
-            print(f"    ✗ Failed to geocode: {branch['address']}")
+        cached_count = sum(1 for location in results if location)
+        if cached_count:
+            print(f"  Loaded {cached_count} branches from cache")
         
-        # Rate limiting to avoid overwhelming the geocoding service
-        time.sleep(1)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(geocode_address, branches[i]["address"], geocode): i
+                for i in pending
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                i = futures[future]
+                branch = branches[i]
+                print(f"  Geocoded {done}/{len(pending)}: {branch['name']}...")
+                try:
+                    lat, lon = future.result()
+                except (GeocoderTimedOut, GeocoderServiceError) as e:
+                    # Transient failure: report it but don't cache, so the
+                    # next run tries again
+                    print(f"    ✗ Failed to geocode {branch['address']}: {e}")
+                    continue
+                
+                if lat and lon:
+                    results[i] = {
+                        "name": branch["name"],
+                        "address": branch["address"],
+                        "latitude": lat,
+                        "longitude": lon
+                    }
+                    # Cache writes stay on this thread; shelve is not thread-safe
+                    cache[cache_key(branch["address"])] = (lat, lon, time.time())
+                    print(f"    ✓ Found: ({lat:.4f}, {lon:.4f})")
+                else:
+                    # Nominatim answered with no match; remember that
+                    cache[cache_key(branch["address"])] = (None, None, time.time())
+                    print(f"    ✗ No match found: {branch['address']}")
     
+    # Keep the original branch order regardless of completion order
+    branch_locations = [location for location in results if location]
     return branch_locations
 
 
 def create_map(florida_counties, branch_locations):
     """
-    Create an interactive Folium map with county boundaries and branch markers.
+    Render the interactive Leaflet map with county boundaries and branch markers.
+    Returns the HTML page as a string.
     """
     print("Creating interactive map...")
     
-    # Calculate center of Florida counties for initial map view
-    bounds = florida_counties.total_bounds
-    center_lat = (bounds[1] + bounds[3]) / 2
-    center_lon = (bounds[0] + bounds[2]) / 2
-    
-    # Initialize the map centered on Florida
-    florida_map = folium.Map(
-        location=[center_lat, center_lon],
-        zoom_start=7,
-        tiles='OpenStreetMap'
-    )
-    
-    # Add county boundaries as a GeoJSON layer
-    folium.GeoJson(
+    # Convert counties to TopoJSON so shared borders are stored once and
+    # coordinates are quantised, which keeps the HTML payload small.
+    # Simplification happens here, on the shared arcs, so neighbouring
+    # counties keep matching borders
+    topo = topojson.Topology(
         florida_counties,
-        name='Florida Counties',
-        style_function=lambda feature: {
-            'fillColor': '#4A90E2',
-            'color': '#2C3E50',
-            'weight': 1.5,
-            'fillOpacity': 0.2,
-            'dashArray': '5, 5'
-        },
-        tooltip=folium.GeoJsonTooltip(
-            fields=['NAME'],
-            aliases=['County: '],
-            sticky=True
-        )
-    ).add_to(florida_map)
-    
-    # Add branch markers
-    for branch in branch_locations:
-        folium.Marker(
-            location=[branch['latitude'], branch['longitude']],
-            popup=folium.Popup(
-                f"<b>{branch['name']}</b><br>{branch['address']}",
-                max_width=300
-            ),
-            tooltip=branch['name'],
-            icon=folium.Icon(color='red', icon='tint', prefix='fa')
-        ).add_to(florida_map)
+        prequantize=TOPOJSON_QUANTIZATION,
+        toposimplify=SIMPLIFY_TOLERANCE
+    ).to_dict()
     
-    # Add layer control to toggle county boundaries
-    folium.LayerControl().add_to(florida_map)
+    # orjson encodes the arcs (including NumPy arrays) far faster than stdlib json
+    counties_topojson = orjson.dumps(topo, option=orjson.OPT_SERIALIZE_NUMPY).decode()
     
-    # Add a title/legend
-    title_html = '''
-    <div style="position: fixed; 
-                top: 10px; left: 50px; width: 300px; height: 90px; 
-                background-color: white; border:2px solid grey; z-index:9999; 
-                font-size:14px; padding: 10px">
-    <h4 style="margin-top:0">Fortiline Waterworks - Florida</h4>
-    <p style="margin-bottom:0">Red markers: Branch locations<br>
-    Click markers for details</p>
-    </div>
-    '''
-    florida_map.get_root().html.add_child(folium.Element(title_html))
+    markers = [
+        {
+            "name": branch["name"],
+            "address": branch["address"],
+            "latitude": branch["latitude"],
+            "longitude": branch["longitude"]
+        }
+        for branch in branch_locations
+    ]
     
-    return florida_map
+    # Render the page directly from the template instead of building a
+    # Folium object tree; only the two JSON payloads vary between runs
+    template = TEMPLATE_ENV.get_template(MAP_TEMPLATE)
+    return template.render(
+        center=list(FLORIDA_CENTER),
+        zoom=7,
+        counties_topojson=counties_topojson,
+        markers=markers
+    )
 
 
 def main():
@@ -240,25 +412,33 @@ def main():
     print("=" * 60)
     
     try:
-        # Step 1: Get Florida county boundaries
-        florida_counties = get_florida_counties()
-        
-        # Step 2: Get Fortiline branch data
+        # Step 1: Get Fortiline branch data (coordinates are pre-geocoded)
         branches = get_fortiline_branches()
+        branch_locations = [b for b in branches if b["latitude"] is not None]
+        missing = [b for b in branches if b["latitude"] is None]
         
-        # Step 3: Geocode branch addresses
-        branch_locations = geocode_branches(branches)
+        # Steps 2 & 3: Download county boundaries and geocode any branches
+        # missing from the static table concurrently; they hit different
+        # servers and do not depend on each other
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            counties_future = executor.submit(get_florida_counties)
+            geocode_future = executor.submit(geocode_branches, missing) if missing else None
+            
+            florida_counties = counties_future.result()
+            if geocode_future:
+                branch_locations += geocode_future.result()
         
         if not branch_locations:
             print("ERROR: No branches were successfully geocoded!")
             return
         
         # Step 4: Create the interactive map
-        florida_map = create_map(florida_counties, branch_locations)
+        map_html = create_map(florida_counties, branch_locations)
         
         # Step 5: Save the map
         output_file = "fortiline_florida_map.html"
-        florida_map.save(output_file)
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write(map_html)
         
         print("\n" + "=" * 60)
         print(f"✓ Map successfully created: {output_file}")
@@ -272,12 +452,23 @@ def main():
         print("\nTroubleshooting tips:")
         print("1. Ensure you have internet access")
         print("2. Check that all required packages are installed:")
-        print("   pip install requests pandas geopandas folium geopy")
+        print("   pip install requests pandas geopandas pyogrio jinja2 topojson orjson geopy")
         print("3. If geocoding fails, you may need to wait and try again")
         raise
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Generate the Fortiline Florida county map.")
+    parser.add_argument(
+        "--refresh-geocodes",
+        action="store_true",
+        help="geocode all branch addresses and print an updated static table"
+    )
+    args = parser.parse_args()
+    
+    if args.refresh_geocodes:
+        refresh_geocodes()
+    else:
+        main()
 
    
\ No newline at end of file